@@ -13,10 +13,14 @@
 # limitations under the License.
 
 import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
 
 
 # -- Mutating keyword set for quick string matching --
-MUTATING_KEYWORDS = {
+MUTATING_KEYWORDS: set[str] = {
     'INSERT',
     'UPDATE',
     'DELETE',
@@ -37,12 +41,23 @@ MUTATING_KEYWORDS = {
     'UPSERT',
 }
 
-MUTATING_PATTERN = re.compile(
+MUTATING_PATTERN: re.Pattern[str] = re.compile(
     r'(?i)\b(' + '|'.join(re.escape(k) for k in MUTATING_KEYWORDS) + r')\b'
 )
 
+# Case-sensitive form of MUTATING_PATTERN for ASCII queries that have already been lowercased;
+# IGNORECASE matching is several times slower
+MUTATING_LOWERCASE_PATTERN: re.Pattern[str] = re.compile(
+    r'\b(' + '|'.join(re.escape(k.lower()) for k in MUTATING_KEYWORDS) + r')\b'
+)
+
+# Lowercased first word of each keyword; every MUTATING_PATTERN match contains one of these
+MUTATING_KEYWORD_TOKENS: tuple[str, ...] = tuple(
+    sorted({k.split()[0].lower() for k in MUTATING_KEYWORDS})
+)
+
 # -- Regex for DDL statements --
-DDL_REGEX = re.compile(
+DDL_REGEX: re.Pattern[str] = re.compile(
     r"""
     ^\s*(
         CREATE\s+(TABLE|VIEW|INDEX|TRIGGER|PROCEDURE|FUNCTION|EVENT|SCHEMA|DATABASE|ROLE|USER)|
@@ -56,7 +71,7 @@ DDL_REGEX = re.compile(
 )
 
 # -- Regex for permission-related statements --
-PERMISSION_REGEX = re.compile(
+PERMISSION_REGEX: re.Pattern[str] = re.compile(
     r"""
     ^\s*(
         GRANT(\s+ROLE)?|
@@ -73,7 +88,7 @@ PERMISSION_REGEX = re.compile(
 )
 
 # -- Regex for system/control-level operations --
-SYSTEM_REGEX = re.compile(
+SYSTEM_REGEX: re.Pattern[str] = re.compile(
     r"""
     ^\s*(
         SET\s+(GLOBAL|PERSIST|SESSION)|
@@ -96,7 +111,7 @@ SYSTEM_REGEX = re.compile(
 )
 
 # -- Transaction control statements that could be used for SQL injection --
-TRANSACTION_CONTROL_REGEX = re.compile(
+TRANSACTION_CONTROL_REGEX: re.Pattern[str] = re.compile(
     r"""
     ^\s*(
         BEGIN(\s+TRANSACTION)?(\s+READ\s+ONLY)?|
@@ -110,8 +125,50 @@ TRANSACTION_CONTROL_REGEX = re.compile(
     re.IGNORECASE | re.VERBOSE,
 )
 
+# -- Statement category regexes, with the lowercase words each one can start with --
+STATEMENT_CATEGORIES: tuple[tuple[str, re.Pattern[str], tuple[str, ...]], ...] = (
+    ('DDL', DDL_REGEX, ('create', 'drop', 'alter', 'rename', 'truncate')),
+    (
+        'PERMISSION',
+        PERMISSION_REGEX,
+        ('grant', 'revoke', 'create', 'drop', 'set', 'alter', 'rename'),
+    ),
+    (
+        'SYSTEM',
+        SYSTEM_REGEX,
+        (
+            'set',
+            'reset',
+            'flush',
+            'install',
+            'uninstall',
+            'change',
+            'start',
+            'stop',
+            'purge',
+            'load',
+            'select',
+            'use',
+            'copy',
+        ),
+    ),
+    (
+        'TRANSACTION_CONTROL',
+        TRANSACTION_CONTROL_REGEX,
+        ('begin', 'commit', 'rollback', 'savepoint', 'release', 'start'),
+    ),
+)
+
+# The category regexes are anchored to the start of the query, so for an ASCII query only
+# those listed under its lowercased first word can match
+LEADING_WORD_REGEX: re.Pattern[str] = re.compile(r'\s*([a-zA-Z]+)')
+LEADING_WORD_CATEGORIES: dict[str, list[tuple[str, re.Pattern[str]]]] = {}
+for _category, _regex, _words in STATEMENT_CATEGORIES:
+    for _word in _words:
+        LEADING_WORD_CATEGORIES.setdefault(_word, []).append((_category, _regex))
+
 # -- Suspicious pattern detection (SQL injection, stacked queries, etc.) --
-SUSPICIOUS_PATTERNS = [
+SUSPICIOUS_PATTERNS: list[str] = [
     r"(?i)'.*?--",  # comment injection
     r'(?i)\bor\b\s+\d+\s*=\s*\d+',  # numeric tautology
     r"(?i)\bor\b\s*'[^']+'\s*=\s*'[^']+'",  # string tautology
@@ -129,33 +186,216 @@ SUSPICIOUS_PATTERNS = [
     r'(?i)\b(begin|commit|rollback)\b.*;\s*\w+',  # Transaction control followed by other statements
 ]
 
+SUSPICIOUS_REGEXES: list[re.Pattern[str]] = [
+    re.compile(pattern) for pattern in SUSPICIOUS_PATTERNS
+]
+
+# Case-sensitive forms of SUSPICIOUS_PATTERNS for lowercased ASCII queries. The patterns are
+# already written in lowercase, so only the (?i) flag is dropped.
+SUSPICIOUS_LOWERCASE_REGEXES: list[re.Pattern[str]] = [
+    re.compile(pattern.removeprefix('(?i)')) for pattern in SUSPICIOUS_PATTERNS
+]
+
+# Lowercase literals for each entry of SUSPICIOUS_PATTERNS (same order); a pattern can only
+# match a query that contains at least one of its literals
+SUSPICIOUS_PATTERN_LITERALS: list[frozenset[str]] = [
+    frozenset(literals)
+    for literals in (
+        ('--',),
+        ('or',),
+        ('or',),
+        ('union',),
+        ('drop',),
+        ('truncate',),
+        ('grant', 'revoke'),
+        (';',),
+        ('sleep',),
+        ('pg_sleep',),
+        ('load_file',),
+        ('outfile',),
+        ('copy',),
+        ('copy',),
+        (';',),
+    )
+]
+SUSPICIOUS_LITERALS: frozenset[str] = frozenset().union(*SUSPICIOUS_PATTERN_LITERALS)
+
+# -- Transaction bypass detection (COMMIT followed by statements, stacked queries) --
+COMMIT_BYPASS_REGEX: re.Pattern[str] = re.compile(
+    r'(?i)\bcommit\b.*?;\s*(?!($|\s*--|\s*/\*))\w+', re.DOTALL
+)
+MULTIPLE_STATEMENTS_REGEX: re.Pattern[str] = re.compile(r';\s*(?!($|\s*--|\s*/\*))(?=\S)')
+
+# -- Line and block comments --
+COMMENT_REGEX: re.Pattern[str] = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+
+# Joins the queries passed to detect_many; it is not a word character, so keyword matches
+# cannot span two queries
+BATCH_SEPARATOR = '\x00'
+
+# Number of distinct queries whose scan results are kept by scan_sql
+SCAN_CACHE_SIZE: int = 1024
+
+# Shared result for the common case of a query without mutating keywords
+_EMPTY_KEYWORDS: frozenset[str] = frozenset()
+
+
+@dataclass(frozen=True, slots=True)
+class ScanResult:
+    """Result of running all read-only checks against a SQL string.
+
+    Attributes:
+        mutating: mutating keywords and statement categories, as from detect_mutating_keywords
+        injection: detected security issues, as from check_sql_injection_risk
+        tx_bypass: whether a transaction bypass attempt was detected
+    """
+
+    mutating: frozenset[str]
+    injection: tuple[dict[str, str], ...]
+    tx_bypass: bool
+
+
+def _match_statement_categories(sql: str) -> set[str]:
+    # IGNORECASE folds a few non-ASCII characters onto ASCII letters, so only ASCII queries
+    # are limited to the category regexes listed under their first word
+    if sql.isascii():
+        leading = LEADING_WORD_REGEX.match(sql)
+        if not leading:
+            return set()
+        categories = LEADING_WORD_CATEGORIES.get(leading.group(1).lower(), [])
+    else:
+        categories = [(category, regex) for category, regex, _ in STATEMENT_CATEGORIES]
+
+    return {category for category, regex in categories if regex.search(sql)}
+
+
+def _detect_mutating_keywords(sql: str) -> frozenset[str]:
+    matched = _match_statement_categories(sql)
+
+    # The shortcuts below only apply to ASCII queries, as in _match_statement_categories
+    if not sql.isascii():
+        matched.update(k.upper() for k in MUTATING_PATTERN.findall(sql))
+        return frozenset(matched) if matched else _EMPTY_KEYWORDS
+
+    # Match individual keywords from MUTATING_KEYWORDS. Most read-only queries contain none of
+    # them, so try a plain substring check before matching the lowercased query
+    # case-sensitively. Normalize casing; the set deduplicates repeated keywords.
+    lowered = sql.lower()
+    if any(token in lowered for token in MUTATING_KEYWORD_TOKENS):
+        matched.update(k.upper() for k in MUTATING_LOWERCASE_PATTERN.findall(lowered))
+
+    return frozenset(matched) if matched else _EMPTY_KEYWORDS
+
+
+def _check_sql_injection_risk(sql: str) -> tuple[dict[str, str], ...]:
+    # Only run the patterns whose literals occur in the query, matching the lowercased query
+    # case-sensitively. As in _detect_mutating_keywords, both shortcuts are limited to ASCII
+    # queries so IGNORECASE matching is unaffected.
+    present: set[str] | None = None
+    regexes: list[re.Pattern[str]] = SUSPICIOUS_REGEXES
+    if sql.isascii():
+        sql = sql.lower()
+        present = {literal for literal in SUSPICIOUS_LITERALS if literal in sql}
+        if not present:
+            return ()
+        regexes = SUSPICIOUS_LOWERCASE_REGEXES
+
+    for pattern, regex, literals in zip(SUSPICIOUS_PATTERNS, regexes, SUSPICIOUS_PATTERN_LITERALS):
+        if present is not None and present.isdisjoint(literals):
+            continue
+        if regex.search(sql):
+            return (
+                {
+                    'type': 'sql',
+                    'message': f'Suspicious pattern detected: {pattern}',
+                    'severity': 'high',
+                },
+            )
+    return ()
+
+
+def _has_multiple_statements(sql: str) -> bool:
+    # Look for COMMIT followed by other statements, or multiple statements separated by semicolons
+    return bool(COMMIT_BYPASS_REGEX.search(sql) or MULTIPLE_STATEMENTS_REGEX.search(sql))
+
+
+def _detect_transaction_bypass_attempt(sql: str) -> bool:
+    # Every bypass needs a semicolon, with or without comments removed
+    if ';' not in sql:
+        return False
+
+    if _has_multiple_statements(sql):
+        return True
+
+    # The patterns above treat a comment after a semicolon as the end of the query, which lets
+    # a comment hide the statement after it ("SELECT 1; -- x\nCOMMIT"). Check again with the
+    # comments removed, but only when the query can contain one.
+    if '--' in sql or '/*' in sql:
+        return _has_multiple_statements(COMMENT_REGEX.sub(' ', sql))
+    return False
+
+
+@lru_cache(maxsize=SCAN_CACHE_SIZE)
+def scan_sql(sql: str) -> ScanResult:
+    """Run the mutating keyword, SQL injection and transaction bypass checks on a query.
+
+    Results are cached per query string, so repeated validation of the same query, and the
+    individual detectors below, do not rescan it.
+
+    Args:
+        sql: query string
+
+    Returns:
+        ScanResult with the findings of all three checks
+    """
+    return ScanResult(
+        mutating=_detect_mutating_keywords(sql),
+        injection=_check_sql_injection_risk(sql),
+        tx_bypass=_detect_transaction_bypass_attempt(sql),
+    )
+
+
+def detect_mutating_keywords(sql: str) -> frozenset[str]:
+    """Return the mutating keywords found in the SQL (excluding comments)."""
+    return scan_sql(sql).mutating
 
-def detect_mutating_keywords(sql: str) -> list[str]:
-    """Return a list of mutating keywords found in the SQL (excluding comments)."""
-    matched = []
 
-    if DDL_REGEX.search(sql):
-        matched.append('DDL')
+def detect_many(sqls: list[str]) -> list[frozenset[str]]:
+    """Return the mutating keywords found in each of several SQL queries.
 
-    if PERMISSION_REGEX.search(sql):
-        matched.append('PERMISSION')
+    Gives the same results as calling detect_mutating_keywords on each query, but matches
+    the keyword pattern in a single pass over all of them and does not use the scan cache.
 
-    if SYSTEM_REGEX.search(sql):
-        matched.append('SYSTEM')
+    Args:
+        sqls: query strings
+
+    Returns:
+        mutating keywords and statement categories for each query, in the same order
+    """
+    matched = [_match_statement_categories(sql) for sql in sqls]
 
-    if TRANSACTION_CONTROL_REGEX.search(sql):
-        matched.append('TRANSACTION_CONTROL')
+    # Offset of each query in the joined string; a match belongs to the last query starting
+    # at or before it
+    joined = BATCH_SEPARATOR.join(sqls)
+    starts = list(accumulate((len(sql) + len(BATCH_SEPARATOR) for sql in sqls[:-1]), initial=0))
 
-    # Match individual keywords from MUTATING_KEYWORDS
-    keyword_matches = MUTATING_PATTERN.findall(sql)
-    if keyword_matches:
-        # Deduplicate and normalize casing
-        matched.extend(sorted({k.upper() for k in keyword_matches}))
+    # Same ASCII shortcuts as _detect_mutating_keywords, applied to the whole batch
+    if not joined.isascii():
+        matches = MUTATING_PATTERN.finditer(joined)
+    else:
+        lowered = joined.lower()
+        if any(token in lowered for token in MUTATING_KEYWORD_TOKENS):
+            matches = MUTATING_LOWERCASE_PATTERN.finditer(lowered)
+        else:
+            matches = iter(())
 
-    return matched
+    for match in matches:
+        matched[bisect_right(starts, match.start()) - 1].add(match.group(1).upper())
 
+    return [frozenset(keywords) if keywords else _EMPTY_KEYWORDS for keywords in matched]
 
-def check_sql_injection_risk(sql: str) -> list[dict]:
+
+def check_sql_injection_risk(sql: str) -> list[dict[str, str]]:
     """Check for potential SQL injection risks in sql query.
 
     Args:
@@ -164,18 +404,8 @@ def check_sql_injection_risk(sql: str) -> list[dict]:
     Returns:
         dictionaries containing detected security issue
     """
-    issues = []
-    for pattern in SUSPICIOUS_PATTERNS:
-        if re.search(pattern, sql):
-            issues.append(
-                {
-                    'type': 'sql',
-                    'message': f'Suspicious pattern detected: {pattern}',
-                    'severity': 'high',
-                }
-            )
-            break
-    return issues
+    # Copy the cached issues so callers cannot modify them
+    return [dict(issue) for issue in scan_sql(sql).injection]
 
 
 def detect_transaction_bypass_attempt(sql: str) -> bool:
@@ -190,10 +420,4 @@ def detect_transaction_bypass_attempt(sql: str) -> bool:
     Returns:
         True if a bypass attempt is detected, False otherwise
     """
-    # Look for COMMIT followed by other statements
-    commit_bypass_pattern = re.compile(r'(?i)\bcommit\b.*?;\s*(?!($|\s*--|\s*/\*))\w+', re.DOTALL)
-
-    # Look for multiple statements separated by semicolons
-    multiple_statements = re.compile(r';\s*(?!($|\s*--|\s*/\*))(?=\S)')
-
-    return bool(commit_bypass_pattern.search(sql)) or len(multiple_statements.findall(sql)) > 0
+    return scan_sql(sql).tx_bypass
@@ -46,11 +46,7 @@ from awslabs.aurora_dsql_mcp_server.consts import (
     READ_ONLY_QUERY_WRITE_ERROR,
     ROLLBACK_TRANSACTION_SQL,
 )
-from awslabs.aurora_dsql_mcp_server.mutable_sql_detector import (
-    check_sql_injection_risk,
-    detect_mutating_keywords,
-    detect_transaction_bypass_attempt,
-)
+from awslabs.aurora_dsql_mcp_server.mutable_sql_detector import scan_sql
 from loguru import logger
 from mcp.server.fastmcp import Context, FastMCP
 from pydantic import Field
@@ -136,17 +132,19 @@ async def readonly_query(
         raise ValueError(ERROR_EMPTY_SQL_PASSED_TO_READONLY_QUERY)
 
     # Security checks for read-only mode
+    scan = scan_sql(sql)
+
     # Check for mutating keywords that shouldn't be allowed in read-only queries
-    mutating_matches = detect_mutating_keywords(sql)
+    mutating_matches = scan.mutating
     if mutating_matches:
         logger.warning(
-            f'readonly_query rejected due to mutating keywords: {mutating_matches}, SQL: {sql}'
+            f'readonly_query rejected due to mutating keywords: {sorted(mutating_matches)}, SQL: {sql}'
         )
         await ctx.error(ERROR_WRITE_QUERY_PROHIBITED)
         raise Exception(ERROR_WRITE_QUERY_PROHIBITED)
 
     # Check for SQL injection risks
-    injection_issues = check_sql_injection_risk(sql)
+    injection_issues = list(scan.injection)
     if injection_issues:
         logger.warning(
             f'readonly_query rejected due to injection risks: {injection_issues}, SQL: {sql}'
@@ -155,7 +153,7 @@ async def readonly_query(
         raise Exception(f'{ERROR_QUERY_INJECTION_RISK}: {injection_issues}')
 
     # Check for transaction bypass attempts (the main vulnerability)
-    if detect_transaction_bypass_attempt(sql):
+    if scan.tx_bypass:
         logger.warning(f'readonly_query rejected due to transaction bypass attempt, SQL: {sql}')
         await ctx.error(ERROR_TRANSACTION_BYPASS_ATTEMPT)
         raise Exception(ERROR_TRANSACTION_BYPASS_ATTEMPT)
@@ -14,18 +14,19 @@
 
 """Tests for the readonly enforcement in Aurora DSQL MCP Server."""
 
-import sys
-import os
 import pytest
 from unittest.mock import AsyncMock, patch
-
-# Add the parent directory to the path so we can import the modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
 from awslabs.aurora_dsql_mcp_server.mutable_sql_detector import (
     check_sql_injection_risk,
+    detect_many,
     detect_mutating_keywords,
     detect_transaction_bypass_attempt,
+    scan_sql,
+    MUTATING_PATTERN,
+    STATEMENT_CATEGORIES,
+    SUSPICIOUS_PATTERN_LITERALS,
+    SUSPICIOUS_PATTERNS,
+    SUSPICIOUS_REGEXES,
 )
 from awslabs.aurora_dsql_mcp_server.server import readonly_query
 from awslabs.aurora_dsql_mcp_server.consts import (
@@ -37,6 +38,64 @@ from awslabs.aurora_dsql_mcp_server.consts import (
 
 ctx = AsyncMock()
 
+SAFE_QUERIES = [
+    "SELECT * FROM users",
+    "SELECT id, name FROM users WHERE active = true",
+    "SELECT COUNT(*) FROM orders",
+    "SELECT u.name, o.total FROM users u JOIN orders o ON u.id = o.user_id",
+    "WITH recent_orders AS (SELECT * FROM orders WHERE created_at > '2023-01-01') SELECT * FROM recent_orders",
+]
+
+INJECTION_QUERIES = [
+    "SELECT * FROM users WHERE id = 1 OR 1=1",
+    "SELECT * FROM users WHERE name = 'test' OR 'a'='a'",
+    "SELECT * FROM users; DROP TABLE users; --",
+    "SELECT * FROM users UNION SELECT * FROM admin_users",
+    "SELECT * FROM users WHERE id = 1; INSERT INTO logs VALUES ('hacked')",
+]
+
+BYPASS_QUERIES = [
+    "SELECT 1; COMMIT; CREATE TABLE hack (id int)",
+    "SELECT * FROM users; COMMIT; BEGIN; DROP TABLE sensitive_data",
+    "SELECT COUNT(*); ROLLBACK; INSERT INTO logs VALUES ('bypass')",
+    "SELECT name FROM users; COMMIT; ALTER TABLE users ADD COLUMN hacked boolean",
+]
+
+PERMISSION_QUERIES = [
+    "GRANT ALL PRIVILEGES ON database.* TO 'user'@'host'",
+    "REVOKE SELECT ON table FROM user",
+    "CREATE USER 'newuser'@'localhost' IDENTIFIED BY 'password'",
+    "DROP USER 'olduser'@'localhost'",
+]
+
+SYSTEM_QUERIES = [
+    "SET GLOBAL max_connections = 1000",
+    "FLUSH PRIVILEGES",
+    "LOAD DATA INFILE '/tmp/data.csv' INTO TABLE users",
+    "SELECT * INTO OUTFILE '/tmp/output.txt' FROM users",
+]
+
+CASE_VARIATION_QUERIES = [
+    "create table test (id int)",
+    "CREATE TABLE test (id int)",
+    "Create Table test (id int)",
+    "CrEaTe TaBlE test (id int)",
+]
+
+POSTGRESQL_QUERIES = [
+    "COPY users FROM '/tmp/users.csv'",
+    "COPY (SELECT * FROM users) TO '/tmp/export.csv'",
+    "SELECT pg_sleep(5)",
+]
+
+COMMENTED_BYPASS_QUERIES = [
+    "SELECT * FROM users; -- This is a comment\nCOMMIT; CREATE TABLE hack (id int)",
+    "/* Multi-line comment */ SELECT 1; COMMIT; DROP TABLE users",
+    "SELECT 1; -- hide the next statement\nCOMMIT",
+    "SELECT 1; /* hide the next statement */ COMMIT",
+    "SELECT 1;/* first */ /* second */\nSELECT 2",
+]
+
 
 class TestReadonlyEnforcement:
     """Test cases for the readonly enforcement mechanisms."""
@@ -85,130 +144,75 @@ class TestReadonlyEnforcement:
         assert 'DROP' in keywords
         assert 'DDL' in keywords
 
-    def test_safe_select_queries(self):
+    @pytest.mark.parametrize('sql', SAFE_QUERIES)
+    def test_safe_select_queries(self, sql):
         """Test that safe SELECT queries don't trigger security checks."""
-        safe_queries = [
-            "SELECT * FROM users",
-            "SELECT id, name FROM users WHERE active = true",
-            "SELECT COUNT(*) FROM orders",
-            "SELECT u.name, o.total FROM users u JOIN orders o ON u.id = o.user_id",
-            "WITH recent_orders AS (SELECT * FROM orders WHERE created_at > '2023-01-01') SELECT * FROM recent_orders",
-        ]
+        # Should not detect mutating keywords
+        assert detect_mutating_keywords(sql) == frozenset()
 
-        for sql in safe_queries:
-            # Should not detect mutating keywords
-            assert detect_mutating_keywords(sql) == []
+        # Should not detect injection risks
+        assert check_sql_injection_risk(sql) == []
 
-            # Should not detect injection risks
-            assert check_sql_injection_risk(sql) == []
+        # Should not detect transaction bypass attempts
+        assert detect_transaction_bypass_attempt(sql) is False
 
-            # Should not detect transaction bypass attempts
-            assert detect_transaction_bypass_attempt(sql) is False
-
-    def test_sql_injection_patterns(self):
+    @pytest.mark.parametrize('sql', INJECTION_QUERIES)
+    def test_sql_injection_patterns(self, sql):
         """Test detection of various SQL injection patterns."""
-        injection_patterns = [
-            "SELECT * FROM users WHERE id = 1 OR 1=1",
-            "SELECT * FROM users WHERE name = 'test' OR 'a'='a'",
-            "SELECT * FROM users; DROP TABLE users; --",
-            "SELECT * FROM users UNION SELECT * FROM admin_users",
-            "SELECT * FROM users WHERE id = 1; INSERT INTO logs VALUES ('hacked')",
-        ]
+        issues = check_sql_injection_risk(sql)
+        assert len(issues) > 0, f"Should detect injection risk in: {sql}"
 
-        for sql in injection_patterns:
-            issues = check_sql_injection_risk(sql)
-            assert len(issues) > 0, f"Should detect injection risk in: {sql}"
-
-    def test_transaction_bypass_variations(self):
+    @pytest.mark.parametrize('sql', BYPASS_QUERIES)
+    def test_transaction_bypass_variations(self, sql):
         """Test detection of various transaction bypass attempts."""
-        bypass_attempts = [
-            "SELECT 1; COMMIT; CREATE TABLE hack (id int)",
-            "SELECT * FROM users; COMMIT; BEGIN; DROP TABLE sensitive_data",
-            "SELECT COUNT(*); ROLLBACK; INSERT INTO logs VALUES ('bypass')",
-            "SELECT name FROM users; COMMIT; ALTER TABLE users ADD COLUMN hacked boolean",
-        ]
-
-        for sql in bypass_attempts:
-            assert detect_transaction_bypass_attempt(sql) is True, f"Should detect bypass in: {sql}"
+        assert detect_transaction_bypass_attempt(sql) is True, f"Should detect bypass in: {sql}"
 
-    def test_permission_statements(self):
+    @pytest.mark.parametrize('sql', PERMISSION_QUERIES)
+    def test_permission_statements(self, sql):
         """Test detection of permission-related statements."""
-        permission_sql = [
-            "GRANT ALL PRIVILEGES ON database.* TO 'user'@'host'",
-            "REVOKE SELECT ON table FROM user",
-            "CREATE USER 'newuser'@'localhost' IDENTIFIED BY 'password'",
-            "DROP USER 'olduser'@'localhost'",
-        ]
-
-        for sql in permission_sql:
-            keywords = detect_mutating_keywords(sql)
-            assert 'PERMISSION' in keywords, f"Should detect permission keywords in: {sql}"
+        keywords = detect_mutating_keywords(sql)
+        assert 'PERMISSION' in keywords, f"Should detect permission keywords in: {sql}"
 
-    def test_system_statements(self):
+    @pytest.mark.parametrize('sql', SYSTEM_QUERIES)
+    def test_system_statements(self, sql):
         """Test detection of system-level statements."""
-        system_sql = [
-            "SET GLOBAL max_connections = 1000",
-            "FLUSH PRIVILEGES",
-            "LOAD DATA INFILE '/tmp/data.csv' INTO TABLE users",
-            "SELECT * INTO OUTFILE '/tmp/output.txt' FROM users",
-        ]
-
-        for sql in system_sql:
-            keywords = detect_mutating_keywords(sql)
-            assert 'SYSTEM' in keywords, f"Should detect system keywords in: {sql}"
+        keywords = detect_mutating_keywords(sql)
+        assert 'SYSTEM' in keywords, f"Should detect system keywords in: {sql}"
 
-    def test_case_insensitive_detection(self):
+    @pytest.mark.parametrize('sql', CASE_VARIATION_QUERIES)
+    def test_case_insensitive_detection(self, sql):
         """Test that detection works regardless of case."""
-        variations = [
-            "create table test (id int)",
-            "CREATE TABLE test (id int)",
-            "Create Table test (id int)",
-            "CrEaTe TaBlE test (id int)",
-        ]
-
-        for sql in variations:
-            keywords = detect_mutating_keywords(sql)
-            assert 'CREATE' in keywords, f"Should detect CREATE regardless of case in: {sql}"
-            assert 'DDL' in keywords, f"Should detect DDL regardless of case in: {sql}"
+        keywords = detect_mutating_keywords(sql)
+        assert 'CREATE' in keywords, f"Should detect CREATE regardless of case in: {sql}"
+        assert 'DDL' in keywords, f"Should detect DDL regardless of case in: {sql}"
 
-    def test_postgresql_specific_patterns(self):
+    @pytest.mark.parametrize('sql', POSTGRESQL_QUERIES)
+    def test_postgresql_specific_patterns(self, sql):
         """Test detection of PostgreSQL-specific patterns."""
-        postgres_sql = [
-            "COPY users FROM '/tmp/users.csv'",
-            "COPY (SELECT * FROM users) TO '/tmp/export.csv'",
-            "SELECT pg_sleep(5)",
-        ]
-
-        for sql in postgres_sql:
-            # Should detect either mutating keywords or injection risks
-            has_mutating = len(detect_mutating_keywords(sql)) > 0
-            has_injection = len(check_sql_injection_risk(sql)) > 0
-            assert has_mutating or has_injection, f"Should detect security issue in: {sql}"
+        # Should detect either mutating keywords or injection risks
+        has_mutating = len(detect_mutating_keywords(sql)) > 0
+        has_injection = len(check_sql_injection_risk(sql)) > 0
+        assert has_mutating or has_injection, f"Should detect security issue in: {sql}"
 
-    def test_comment_handling(self):
+    @pytest.mark.parametrize('sql', COMMENTED_BYPASS_QUERIES)
+    def test_comment_handling(self, sql):
         """Test that comments don't interfere with detection."""
-        sql_with_comments = [
-            "SELECT * FROM users; -- This is a comment\nCOMMIT; CREATE TABLE hack (id int)",
-            "/* Multi-line comment */ SELECT 1; COMMIT; DROP TABLE users",
-        ]
-
-        for sql in sql_with_comments:
-            assert detect_transaction_bypass_attempt(sql) is True, f"Should detect bypass despite comments in: {sql}"
+        assert detect_transaction_bypass_attempt(sql) is True, f"Should detect bypass despite comments in: {sql}"
 
     def test_empty_and_whitespace_sql_handling(self):
         """Test handling of empty SQL, whitespace, and comment-only queries."""
         # Test empty SQL
-        assert detect_mutating_keywords("") == []
+        assert detect_mutating_keywords("") == frozenset()
         assert check_sql_injection_risk("") == []
         assert detect_transaction_bypass_attempt("") is False
 
         # Test whitespace only
-        assert detect_mutating_keywords("   ") == []
+        assert detect_mutating_keywords("   ") == frozenset()
         assert check_sql_injection_risk("   ") == []
         assert detect_transaction_bypass_attempt("   ") is False
 
         # Test SQL with only comments
-        assert detect_mutating_keywords("-- This is just a comment") == []
+        assert detect_mutating_keywords("-- This is just a comment") == frozenset()
         assert check_sql_injection_risk("-- This is just a comment") == []
         assert detect_transaction_bypass_attempt("-- This is just a comment") is False
 
@@ -269,9 +273,8 @@ class TestReadonlyEnforcement:
         # Test deduplication of keywords
         duplicate_sql = "CREATE TABLE test1 (id int); CREATE TABLE test2 (id int)"
         keywords = detect_mutating_keywords(duplicate_sql)
-        # CREATE should only appear once in the result
-        create_count = keywords.count('CREATE')
-        assert create_count == 1, f"CREATE should appear only once, but found {create_count} times"
+        # CREATE is reported once, alongside the DDL category
+        assert keywords == frozenset({'CREATE', 'DDL'})
 
     def test_transaction_bypass_edge_cases(self):
         """Test edge cases for transaction bypass detection."""
@@ -296,6 +299,140 @@ class TestReadonlyEnforcement:
         for sql in non_bypass_sql:
             assert detect_transaction_bypass_attempt(sql) is True, f"Should detect multiple statements in: {sql}"
 
+    def test_keyword_prefilter_edge_cases(self):
+        """Test that the substring shortcut does not change keyword detection."""
+        # Keyword inside an identifier falls through to the regex, which rejects it
+        assert detect_mutating_keywords("SELECT created_at, updated_by FROM users") == frozenset()
+
+        # Non-ASCII input skips the shortcut, so case-insensitive matches are kept
+        assert 'INSERT' in detect_mutating_keywords("\u0131nsert into users values (1)")
+
+    def test_leading_word_dispatch_matches_all_category_regexes(self):
+        """Test that picking category regexes by first word finds the same categories as running all of them."""
+        queries = (
+            SAFE_QUERIES
+            + INJECTION_QUERIES
+            + BYPASS_QUERIES
+            + PERMISSION_QUERIES
+            + SYSTEM_QUERIES
+            + CASE_VARIATION_QUERIES
+            + POSTGRESQL_QUERIES
+            + COMMENTED_BYPASS_QUERIES
+            + [
+                "\n\t  DROP TABLE users",
+                "Truncate users",
+                "truncate;",
+                "SELECT * INTO OUTFILE '/tmp/x' FROM users",
+                "start transaction",
+                "START SLAVE",
+                "RELEASE SAVEPOINT sp",
+                "(SELECT 1)",
+                "-- comment\nDROP TABLE users",
+                "use_table",
+            ]
+        )
+
+        for sql in queries:
+            expected = {category for category, regex, _ in STATEMENT_CATEGORIES if regex.search(sql)}
+            actual = detect_mutating_keywords(sql) & {category for category, _, _ in STATEMENT_CATEGORIES}
+            assert actual == expected, f"Mismatch for: {sql}"
+
+    def test_detect_many_matches_individual_detection(self):
+        """Test that detect_many finds the same keywords as detect_mutating_keywords per query."""
+        ascii_queries = (
+            SAFE_QUERIES
+            + BYPASS_QUERIES
+            + PERMISSION_QUERIES
+            + SYSTEM_QUERIES
+            + CASE_VARIATION_QUERIES
+            + POSTGRESQL_QUERIES
+            + ["", "DROP", "TABLE users", "SELECT 1 FROM t\x00INSERT INTO t VALUES (1)"]
+        )
+        batches = [
+            [],
+            [""],
+            ascii_queries,
+            ascii_queries + ["\u0131nsert into users values (1)", "SELECT 'caf\u00e9'"],
+        ]
+
+        for sqls in batches:
+            assert detect_many(sqls) == [detect_mutating_keywords(sql) for sql in sqls]
+
+    def test_lowercase_keyword_match_matches_ignorecase_pattern(self):
+        """Test that matching the lowercased query finds the same keywords as MUTATING_PATTERN."""
+        queries = [
+            "Insert INTO users VALUES (1)",
+            "SELECT 1; uPdAtE users SET name = 'x'",
+            "LOAD   DATA INFILE '/tmp/x' INTO TABLE t",
+            "load data infile '/tmp/x'",
+            "SELECT * FROM t WHERE note = 'Merge; Upsert'",
+            "SELECT created_at, updated_by FROM users",
+        ]
+
+        for sql in queries:
+            expected = {k.upper() for k in MUTATING_PATTERN.findall(sql)}
+            categories = {'DDL', 'PERMISSION', 'SYSTEM', 'TRANSACTION_CONTROL'}
+            assert detect_mutating_keywords(sql) - categories == expected, f"Mismatch for: {sql}"
+
+    def test_injection_literal_prefilter_matches_full_scan(self):
+        """Test that skipping patterns by literal gives the same result as trying every pattern."""
+        assert len(SUSPICIOUS_PATTERN_LITERALS) == len(SUSPICIOUS_PATTERNS)
+
+        queries = [
+            "SELECT * FROM users ORDER BY name",
+            "SELECT * FROM users WHERE id = 1 Or 1=1",
+            "SELECT * FROM users WHERE name = 'test'--",
+            "SELECT * FROM users UNION ALL SELECT * FROM admin",
+            "SELECT PG_SLEEP(5)",
+            "SELECT * INTO OUTFILE '/tmp/x' FROM users",
+            "COPY users TO '/tmp/users.csv'",
+            "BEGIN; SELECT 1",
+            "SELECT 1 FROM t WHERE name = '\u0131'",
+        ]
+
+        for sql in queries:
+            expected = [r.pattern for r in SUSPICIOUS_REGEXES if r.search(sql)][:1]
+            actual = [i['message'].removeprefix('Suspicious pattern detected: ') for i in check_sql_injection_risk(sql)]
+            assert actual == expected, f"Prefilter changed the result for: {sql}"
+
+    def test_scan_sql_matches_individual_detectors(self):
+        """Test that scan_sql reports the same findings as the individual detectors."""
+        queries = [
+            "SELECT * FROM users",
+            "CREATE TABLE test (id int)",
+            "SELECT * FROM users WHERE id = 1 OR 1=1",
+            "SELECT 1; COMMIT; CREATE TABLE hack (id int)",
+            "SELECT 1; -- comment",
+        ]
+
+        for sql in queries:
+            result = scan_sql(sql)
+            assert result.mutating == detect_mutating_keywords(sql)
+            assert list(result.injection) == check_sql_injection_risk(sql)
+            assert result.tx_bypass is detect_transaction_bypass_attempt(sql)
+
+    def test_safe_queries_share_empty_keyword_set(self):
+        """Test that queries without mutating keywords all return the same empty set."""
+        assert detect_mutating_keywords("SELECT 1") is detect_mutating_keywords("SELECT 2")
+
+    def test_scan_sql_is_cached(self):
+        """Test that repeated scans of the same query return the cached result."""
+        sql = "SELECT * FROM users WHERE id = 1 OR 1=1"
+        assert scan_sql(sql) is scan_sql(sql)
+
+        # Modifying the returned issues must not affect later calls
+        issues = check_sql_injection_risk(sql)
+        issues[0]['severity'] = 'low'
+        issues.clear()
+        assert check_sql_injection_risk(sql)[0]['severity'] == 'high'
+
+    def test_scan_result_is_slotted_and_frozen(self):
+        """Test that cached scan results have no instance dict and cannot be modified."""
+        result = scan_sql("SELECT 1")
+        assert not hasattr(result, '__dict__')
+        with pytest.raises(AttributeError):
+            result.tx_bypass = True
+
     # Server-level security integration tests
     async def test_readonly_query_blocks_mutating_keywords(self):
         """Test that readonly_query blocks SQL with mutating keywords."""
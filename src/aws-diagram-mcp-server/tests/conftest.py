@@ -15,16 +15,26 @@
 """Test fixtures for the diagrams-mcp-server tests."""
 
 import pytest
-import tempfile
+import shutil
 from awslabs.aws_diagram_mcp_server.models import DiagramType
-from typing import Dict, Generator
+from typing import Dict
 
 
-@pytest.fixture
-def temp_workspace_dir() -> Generator[str, None, None]:
-    """Create a temporary directory for diagram output."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        yield temp_dir
+@pytest.fixture(scope='session')
+def temp_workspace_dir(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """Create a temporary directory for diagram output, shared by all tests in the session."""
+    return str(tmp_path_factory.mktemp('workspace'))
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]) -> None:
+    """Skip tests marked ``graphviz`` when the Graphviz ``dot`` executable is not installed."""
+    if shutil.which('dot') is not None:
+        return
+
+    skip_graphviz = pytest.mark.skip(reason='Graphviz not installed, skipping test')
+    for item in items:
+        if item.get_closest_marker('graphviz'):
+            item.add_marker(skip_graphviz)
 
 
 @pytest.fixture
@@ -18,12 +18,14 @@
 
 import os
 import pytest
+import signal
 from awslabs.aws_diagram_mcp_server.diagrams_tools import (
     generate_diagram,
     get_diagram_examples,
     list_diagram_icons,
 )
 from awslabs.aws_diagram_mcp_server.models import DiagramType
+from unittest.mock import patch
 
 
 class TestGetDiagramExamples:
@@ -192,6 +194,7 @@ class TestGenerateDiagram:
     """Tests for the generate_diagram function."""
 
     @pytest.mark.asyncio
+    @pytest.mark.graphviz
     async def test_generate_diagram_success(self, aws_diagram_code, temp_workspace_dir):
         """Test successful diagram generation."""
         result = await generate_diagram(
@@ -200,12 +203,6 @@ class TestGenerateDiagram:
             workspace_dir=temp_workspace_dir,
         )
 
-        # Skip the test if Graphviz is not installed
-        if result.status == 'error' and (
-            'executablenotfound' in result.message.lower() or 'dot' in result.message.lower()
-        ):
-            pytest.skip('Graphviz not installed, skipping test')
-
         assert result.path is not None
         assert os.path.exists(result.path)
         assert result.path.endswith('.png')
@@ -216,6 +213,7 @@ class TestGenerateDiagram:
         assert result.path == expected_path
 
     @pytest.mark.asyncio
+    @pytest.mark.graphviz
     async def test_generate_diagram_with_absolute_path(self, aws_diagram_code, temp_workspace_dir):
         """Test diagram generation with an absolute path."""
         absolute_path = os.path.join(temp_workspace_dir, 'absolute_path_diagram')
@@ -224,12 +222,6 @@ class TestGenerateDiagram:
             filename=absolute_path,
         )
 
-        # Skip the test if Graphviz is not installed
-        if result.status == 'error' and (
-            'executablenotfound' in result.message.lower() or 'dot' in result.message.lower()
-        ):
-            pytest.skip('Graphviz not installed, skipping test')
-
         assert result.path is not None
         assert os.path.exists(result.path)
         assert result.path.endswith('.png')
@@ -238,6 +230,7 @@ class TestGenerateDiagram:
         assert result.path == expected_path
 
     @pytest.mark.asyncio
+    @pytest.mark.graphviz
     async def test_generate_diagram_with_random_filename(
         self, aws_diagram_code, temp_workspace_dir
     ):
@@ -247,12 +240,6 @@ class TestGenerateDiagram:
             workspace_dir=temp_workspace_dir,
         )
 
-        # Skip the test if Graphviz is not installed
-        if result.status == 'error' and (
-            'executablenotfound' in result.message.lower() or 'dot' in result.message.lower()
-        ):
-            pytest.skip('Graphviz not installed, skipping test')
-
         assert result.path is not None
         assert os.path.exists(result.path)
         assert result.path.endswith('.png')
@@ -292,7 +279,29 @@ class TestGenerateDiagram:
 
     @pytest.mark.asyncio
     async def test_generate_diagram_with_timeout(self, aws_diagram_code, temp_workspace_dir):
-        """Test diagram generation with a timeout."""
+        """Test that diagram generation reports a timeout."""
+
+        def fire_alarm(seconds):
+            # Run the SIGALRM handler immediately instead of waiting for the real signal
+            if seconds:
+                signal.getsignal(signal.SIGALRM)(signal.SIGALRM, None)
+
+        with patch('signal.alarm', side_effect=fire_alarm):
+            result = await generate_diagram(
+                code=aws_diagram_code,
+                filename='test_timeout_diagram',
+                timeout=1,
+                workspace_dir=temp_workspace_dir,
+            )
+
+        assert result.status == 'error'
+        assert result.path is None
+        assert result.message == 'Diagram generation timed out after 1 seconds'
+
+    @pytest.mark.slow
+    @pytest.mark.asyncio
+    async def test_generate_diagram_with_real_timeout(self, aws_diagram_code, temp_workspace_dir):
+        """Test diagram generation with a real one second timeout."""
         # Use a very short timeout to force a timeout error
         result = await generate_diagram(
             code=aws_diagram_code,
@@ -315,6 +324,7 @@ class TestGenerateDiagram:
             assert os.path.exists(result.path)
 
     @pytest.mark.asyncio
+    @pytest.mark.graphviz
     async def test_generate_sequence_diagram(self, sequence_diagram_code, temp_workspace_dir):
         """Test generating a sequence diagram."""
         result = await generate_diagram(
@@ -323,17 +333,12 @@ class TestGenerateDiagram:
             workspace_dir=temp_workspace_dir,
         )
 
-        # Skip the test if Graphviz is not installed
-        if result.status == 'error' and (
-            'executablenotfound' in result.message.lower() or 'dot' in result.message.lower()
-        ):
-            pytest.skip('Graphviz not installed, skipping test')
-
         assert result.path is not None
         assert os.path.exists(result.path)
         assert result.path.endswith('.png')
 
     @pytest.mark.asyncio
+    @pytest.mark.graphviz
     async def test_generate_flow_diagram(self, flow_diagram_code, temp_workspace_dir):
         """Test generating a flow diagram."""
         result = await generate_diagram(
@@ -342,12 +347,6 @@ class TestGenerateDiagram:
             workspace_dir=temp_workspace_dir,
         )
 
-        # Skip the test if Graphviz is not installed
-        if result.status == 'error' and (
-            'executablenotfound' in result.message.lower() or 'dot' in result.message.lower()
-        ):
-            pytest.skip('Graphviz not installed, skipping test')
-
         assert result.path is not None
         assert os.path.exists(result.path)
         assert result.path.endswith('.png')
@@ -358,6 +357,7 @@ class TestGenerateDiagram:
         assert result.path == expected_path
 
     @pytest.mark.asyncio
+    @pytest.mark.graphviz
     async def test_generate_diagram_with_show_parameter(self, temp_workspace_dir):
         """Test diagram generation with show parameter already set."""
         code = """with Diagram("Test Show Parameter", show=False, filename='test_show_param'):
@@ -368,17 +368,12 @@ class TestGenerateDiagram:
             workspace_dir=temp_workspace_dir,
         )
 
-        # Skip the test if Graphviz is not installed
-        if result.status == 'error' and (
-            'executablenotfound' in result.message.lower() or 'dot' in result.message.lower()
-        ):
-            pytest.skip('Graphviz not installed, skipping test')
-
         assert result.path is not None
         assert os.path.exists(result.path)
         assert result.path.endswith('.png')
 
     @pytest.mark.asyncio
+    @pytest.mark.graphviz
     async def test_generate_diagram_with_filename_parameter(self, temp_workspace_dir):
         """Test diagram generation with filename parameter already set."""
         code = """with Diagram("Test Filename Parameter", filename='test_filename_param'):
@@ -389,12 +384,6 @@ class TestGenerateDiagram:
             workspace_dir=temp_workspace_dir,
         )
 
-        # Skip the test if Graphviz is not installed
-        if result.status == 'error' and (
-            'executablenotfound' in result.message.lower() or 'dot' in result.message.lower()
-        ):
-            pytest.skip('Graphviz not installed, skipping test')
-
         assert result.path is not None
         assert os.path.exists(result.path)
         assert result.path.endswith('.png')
@@ -17,22 +17,39 @@
 from pathlib import Path
 
 
+_STATIC_DIR = Path(__file__).parent.parent / 'static' / 'react'
+
+# The markdown files are static and few, so read them all once at import time
+_MD_CACHE = {path.name: path.read_text(encoding='utf-8') for path in _STATIC_DIR.glob('*.md')}
+
+# Filenames already reported as missing, so each is only warned about once
+_MISSING_FILES: set[str] = set()
+
+
 def load_markdown_file(filename: str) -> str:
     """Load a markdown file from the static/react directory.
 
+    The files are read once when the module is imported. Files added afterwards are read
+    on first use.
+
     Args:
         filename (str): The name of the markdown file to load (e.g. 'basic-ui-setup.md')
 
     Returns:
         str: The content of the markdown file, or empty string if file not found
     """
-    base_dir = Path(__file__).parent.parent
-    react_dir = base_dir / 'static' / 'react'
-    file_path = react_dir / filename
-
-    if file_path.exists():
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    else:
-        print(f'Warning: File not found: {file_path}')
+    content = _MD_CACHE.get(filename)
+    if content is not None:
+        return content
+
+    file_path = _STATIC_DIR / filename
+    try:
+        content = file_path.read_text(encoding='utf-8')
+    except FileNotFoundError:
+        if filename not in _MISSING_FILES:
+            _MISSING_FILES.add(filename)
+            print(f'Warning: File not found: {file_path}')
         return ''
+
+    _MD_CACHE[filename] = content
+    return content
@@ -13,38 +13,66 @@
 # limitations under the License.
 """Tests for file_utils module."""
 
+from awslabs.frontend_mcp_server.utils import file_utils
 from awslabs.frontend_mcp_server.utils.file_utils import load_markdown_file
-from unittest.mock import mock_open, patch
+from unittest.mock import patch
 
 
-@patch('pathlib.Path.exists')
-@patch('builtins.open', new_callable=mock_open, read_data='Test markdown content')
-def test_load_markdown_file_success(mock_file_open, mock_exists):
-    """Test load_markdown_file returns content when file exists."""
+@patch('builtins.open')
+def test_load_markdown_file_success(mock_file_open):
+    """Test load_markdown_file returns the preloaded content without opening the file."""
     # Arrange
-    mock_exists.return_value = True
+    expected = (file_utils._STATIC_DIR / 'essential-knowledge.md').read_text(encoding='utf-8')
 
     # Act
-    result = load_markdown_file('test-file.md')
+    result = load_markdown_file('essential-knowledge.md')
 
     # Assert
-    assert mock_exists.called
-    mock_file_open.assert_called_once()
-    assert result == 'Test markdown content'
+    mock_file_open.assert_not_called()
+    assert result == expected
 
 
-@patch('pathlib.Path.exists')
 @patch('builtins.print')
-def test_load_markdown_file_not_found(mock_print, mock_exists):
+def test_load_markdown_file_not_found(mock_print):
     """Test load_markdown_file returns empty string and prints warning when file not found."""
     # Arrange
-    mock_exists.return_value = False
+    file_utils._MISSING_FILES.discard('non-existent-file.md')
 
     # Act
     result = load_markdown_file('non-existent-file.md')
 
     # Assert
-    assert mock_exists.called
     assert mock_print.called
     assert 'Warning: File not found:' in mock_print.call_args[0][0]
     assert result == ''
+
+
+@patch('builtins.print')
+def test_load_markdown_file_not_found_warns_once(mock_print):
+    """Test load_markdown_file only warns once for the same missing file."""
+    # Arrange
+    file_utils._MISSING_FILES.discard('another-missing-file.md')
+
+    # Act
+    load_markdown_file('another-missing-file.md')
+    result = load_markdown_file('another-missing-file.md')
+
+    # Assert
+    mock_print.assert_called_once()
+    assert result == ''
+
+
+@patch.dict(file_utils._MD_CACHE)
+@patch('pathlib.Path.read_text')
+def test_load_markdown_file_reads_file_added_after_import(mock_read_text):
+    """Test load_markdown_file reads and caches a file missing from the preloaded set."""
+    # Arrange
+    mock_read_text.return_value = 'New markdown content'
+
+    # Act
+    first = load_markdown_file('new-file.md')
+    second = load_markdown_file('new-file.md')
+
+    # Assert
+    mock_read_text.assert_called_once_with(encoding='utf-8')
+    assert first == second == 'New markdown content'